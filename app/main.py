@@ -1,4 +1,4 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List
 import logging
@@ -10,6 +10,7 @@ from .services.ingestion import IngestionService
 from .services.query_processor import QueryProcessor
 from .services.semantic_search import SemanticSearch
 from .services.generation import GenerationService
+from .utils.mistral_gateway import mistral_gateway
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -58,13 +59,14 @@ async def health_check():
     }
 
 @app.post("/ingest", response_model=IngestionResponse)
-async def ingest_documents(files: List[UploadFile] = File(...)):
+async def ingest_documents(background_tasks: BackgroundTasks, files: List[UploadFile] = File(...)):
     try:
         if not files:
             raise HTTPException(400, "No files provided")
         
         processed_files = []
         total_chunks = 0
+        total_deferred = 0
         
         for file in files:
             if not file.filename.lower().endswith('.pdf'):
@@ -75,22 +77,32 @@ async def ingest_documents(files: List[UploadFile] = File(...)):
                 raise HTTPException(400, f"{file.filename} is empty")
             
             # Process document through ingestion service
-            chunks = await ingestion_service.process_document(content, file.filename)
+            chunks, deferred = await ingestion_service.process_document(content, file.filename)
             
             # Add chunks to search index
-            for chunk in chunks:
-                semantic_search.add_document(chunk)
+            semantic_search.add_documents(chunks)
             
             processed_files.append({
                 "filename": file.filename,
-                "chunks_created": len(chunks)
+                "chunks_created": len(chunks),
+                "chunks_deferred": deferred
             })
             total_chunks += len(chunks)
+            total_deferred += deferred
+        
+        # Drain chunks deferred by an earlier upstream outage after responding
+        if ingestion_service.pending_chunks:
+            background_tasks.add_task(drain_pending_chunks)
+        
+        message = f"Successfully processed {len(files)} files"
+        if total_deferred:
+            message = f"Processed {len(files)} files, {total_deferred} chunks deferred until embeddings are available"
         
         return IngestionResponse(
-            message=f"Successfully processed {len(files)} files",
+            message=message,
             processed_files=processed_files,
             total_chunks=total_chunks,
+            pending_chunks=len(ingestion_service.pending_chunks),
             timestamp=datetime.now().isoformat()
         )
         
@@ -100,6 +112,21 @@ async def ingest_documents(files: List[UploadFile] = File(...)):
         logger.error(f"Ingestion failed: {e}")
         raise HTTPException(500, f"Processing failed: {str(e)}")
 
+async def drain_pending_chunks() -> int:
+    retried_chunks = await ingestion_service.retry_pending()
+    semantic_search.add_documents(retried_chunks)
+    return len(retried_chunks)
+
+@app.post("/ingest/retry")
+async def retry_pending_ingestion():
+    chunks_indexed = await drain_pending_chunks()
+    
+    return {
+        "chunks_indexed": chunks_indexed,
+        "pending_chunks": len(ingestion_service.pending_chunks),
+        "breaker_state": mistral_gateway.breaker.state
+    }
+
 @app.post("/query", response_model=QueryResponse)
 async def query_documents(request: QueryRequest):
     try:
@@ -168,3 +195,10 @@ async def query_documents(request: QueryRequest):
 @app.get("/stats")
 async def get_statistics():
     return semantic_search.get_stats()
+
+@app.get("/stats/upstream")
+async def get_upstream_statistics():
+    return {
+        **mistral_gateway.get_stats(),
+        **ingestion_service.get_stats()
+    }
@@ -20,9 +20,11 @@ class QueryResponse(BaseModel):
 class ProcessedFile(BaseModel):
     filename: str
     chunks_created: int
+    chunks_deferred: int = 0
 
 class IngestionResponse(BaseModel):
     message: str
     processed_files: List[ProcessedFile]  
     total_chunks: int
+    pending_chunks: int = 0
     timestamp: str
@@ -1,14 +1,14 @@
 import logging
-import requests
 import os
 from typing import List, Dict, Tuple
+from ..utils.mistral_gateway import mistral_gateway
 
 logger = logging.getLogger(__name__)
 
 class GenerationService:
     def __init__(self):
         self.api_key = os.getenv("MISTRAL_API_KEY")
-        self.base_url = "https://api.mistral.ai/v1"
+        self.gateway = mistral_gateway
         self.model = "mistral-small-latest"
         
         self.use_fallback = not self.api_key or self.api_key == "your_api_key_here"
@@ -37,11 +37,6 @@ Question: {query}
 
 Answer:"""
         
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
         data = {
             "model": self.model,
             "messages": [{"role": "user", "content": prompt}],
@@ -49,20 +44,10 @@ Answer:"""
             "temperature": 0.3
         }
         
-        response = requests.post(
-            f"{self.base_url}/chat/completions",
-            headers=headers,
-            json=data,
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            answer = result["choices"][0]["message"]["content"]
-            confidence = self._calculate_confidence(search_results)
-            return answer, confidence
-        else:
-            raise Exception(f"Mistral API error: {response.status_code}")
+        result = await self.gateway.post("/chat/completions", self.api_key, data)
+        answer = result["choices"][0]["message"]["content"]
+        confidence = self._calculate_confidence(search_results)
+        return answer, confidence
     
     def _generate_fallback_answer(self, query: str, search_results: List[Dict]) -> Tuple[str, float]:
         if not search_results:
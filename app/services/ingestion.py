@@ -1,7 +1,10 @@
+import asyncio
 import logging
-from typing import List, Dict
+from collections import deque
+from typing import List, Dict, Tuple
 from ..utils.pdf_extractor import PDFExtractor
 from ..utils.embeddings import EmbeddingService
+from ..utils.mistral_gateway import UpstreamResponseError
 
 logger = logging.getLogger(__name__)
 
@@ -10,8 +13,13 @@ class IngestionService:
         self.pdf_extractor = PDFExtractor()
         self.embedding_service = EmbeddingService()
         self.processed_documents = []
+        
+        # Chunks whose embedding failed upstream, waiting to be retried
+        self.pending_chunks = deque()
+        self.max_embedding_retries = 5
+        self._retry_lock = asyncio.Lock()
     
-    async def process_document(self, content: bytes, filename: str) -> List[Dict]:
+    async def process_document(self, content: bytes, filename: str) -> Tuple[List[Dict], int]:
         try:
             logger.info(f"Processing document: {filename}")
             
@@ -21,19 +29,88 @@ class IngestionService:
             # Create semantic chunks
             chunks = self.pdf_extractor.create_chunks(text, filename)
             
-            # Generate embeddings for each chunk
+            # Generate embeddings for each chunk, deferring the rest once the upstream is down
             processed_chunks = []
             for chunk in chunks:
-                embedding = await self.embedding_service.get_embedding(chunk['content'])
-                chunk['embedding'] = embedding
-                processed_chunks.append(chunk)
+                if self._upstream_available() and await self._embed_chunk(chunk):
+                    processed_chunks.append(chunk)
+                else:
+                    self.pending_chunks.append(chunk)
             
             # Store processed chunks
             self.processed_documents.extend(processed_chunks)
             
+            deferred = len(chunks) - len(processed_chunks)
+            if deferred:
+                logger.warning(f"Deferred {deferred} chunks of {filename} until embeddings are available")
+            
             logger.info(f"Successfully processed {filename}: {len(processed_chunks)} chunks")
-            return processed_chunks
+            return processed_chunks, deferred
             
         except Exception as e:
             logger.error(f"Document processing failed for {filename}: {e}")
             raise
+    
+    async def retry_pending(self) -> List[Dict]:
+        # Only one drain at a time, concurrent callers leave the queue to it
+        if self._retry_lock.locked():
+            return []
+        
+        async with self._retry_lock:
+            retried_chunks = []
+            try:
+                # Bound the pass so chunks re-queued below are not retried again straight away
+                remaining = len(self.pending_chunks)
+                while remaining and self.pending_chunks:
+                    # Stop the pass as soon as the breaker opens, leaving the rest queued
+                    if not self._upstream_available():
+                        break
+                    
+                    remaining -= 1
+                    chunk = self.pending_chunks.popleft()
+                    try:
+                        embedded = await self._embed_chunk(chunk)
+                    except BaseException:
+                        self.pending_chunks.appendleft(chunk)
+                        raise
+                    
+                    if embedded:
+                        retried_chunks.append(chunk)
+                    elif chunk.get('embedding_attempts', 0) < self.max_embedding_retries:
+                        self.pending_chunks.append(chunk)
+                    else:
+                        logger.error(f"Dropping chunk {chunk['chunk_id']} of {chunk['filename']} after {chunk['embedding_attempts']} failed embedding attempts")
+            except BaseException:
+                # Cancelled mid-pass: nothing embedded so far has been handed back yet, keep it queued
+                self.pending_chunks.extendleft(reversed(retried_chunks))
+                raise
+        
+        self.processed_documents.extend(retried_chunks)
+        
+        if retried_chunks:
+            logger.info(f"Embedded {len(retried_chunks)} deferred chunks, {len(self.pending_chunks)} still pending")
+        return retried_chunks
+    
+    def _upstream_available(self) -> bool:
+        return self.embedding_service.use_fallback or self.embedding_service.gateway.is_available()
+    
+    async def _embed_chunk(self, chunk: Dict) -> bool:
+        try:
+            chunk['embedding'] = await self.embedding_service.get_embedding(chunk['content'], allow_fallback=False)
+            return True
+        except UpstreamResponseError as e:
+            # Only a definitive rejection of this chunk uses up a retry, outages never do
+            if not e.is_transient():
+                chunk['embedding_attempts'] = chunk.get('embedding_attempts', 0) + 1
+            logger.debug(f"Embedding failed for chunk {chunk['chunk_id']} of {chunk['filename']}: {e}")
+            return False
+        except Exception as e:
+            logger.debug(f"Embedding failed for chunk {chunk['chunk_id']} of {chunk['filename']}: {e}")
+            return False
+    
+    def get_stats(self) -> Dict:
+        return {
+            "pending_chunks": len(self.pending_chunks),
+            "pending_files": len(set(chunk['filename'] for chunk in self.pending_chunks)),
+            "retry_in_progress": self._retry_lock.locked()
+        }
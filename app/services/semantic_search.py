@@ -1,34 +1,115 @@
+import asyncio
+import heapq
 import logging
+import os
 import numpy as np
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import List, Dict, Optional, Tuple
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 
 logger = logging.getLogger(__name__)
 
-class SemanticSearch:
+# (score, global row, result) - the row breaks score ties in corpus order
+ShardHit = Tuple[float, int, Dict]
+
+def _rank_key(hit: ShardHit):
+    return hit[0], -hit[1]
+
+class SearchShard:
     def __init__(self):
         self.documents = []
-        self.tfidf_vectorizer = TfidfVectorizer(
+        self.word_sets = []
+        self.rows = []
+    
+    def add_document(self, document: Dict, row: int):
+        self.documents.append(document)
+        self.word_sets.append(set(document['content'].lower().split()))
+        self.rows.append(row)
+    
+    def semantic_search(self, query_words: set, top_k: int) -> List[ShardHit]:
+        hits = []
+        
+        for doc, content_words, row in zip(self.documents, self.word_sets, self.rows):
+            overlap = len(query_words.intersection(content_words))
+            score = overlap / len(query_words) if query_words else 0
+            
+            if score > 0:
+                result = doc.copy()
+                result['score'] = score
+                hits.append((score, row, result))
+        
+        return heapq.nlargest(top_k, hits, key=_rank_key)
+    
+    def keyword_search(self, query_vector, tfidf_matrix, top_k: int) -> List[ShardHit]:
+        similarities = cosine_similarity(query_vector, tfidf_matrix)[0]
+        
+        # Stable sort in NumPy keeps ties in corpus order, rows are stored ascending
+        candidates = np.argsort(-similarities, kind='stable')[:top_k]
+        
+        hits = []
+        for idx in candidates:
+            score = similarities[idx]
+            if score > 0:
+                result = self.documents[idx].copy()
+                result['score'] = float(score)
+                hits.append((float(score), self.rows[idx], result))
+        
+        return hits
+
+class SemanticSearch:
+    def __init__(self, num_shards: Optional[int] = None):
+        self.documents = []
+        
+        # Only the TF-IDF kernels release the GIL, so a few shards capture most of the gain
+        self.num_shards = max(1, num_shards or int(os.getenv("SEARCH_SHARDS", 0)) or min(os.cpu_count() or 1, 4))
+        self.fanout_min_chunks = int(os.getenv("SEARCH_FANOUT_MIN_CHUNKS", 2000))
+        self.shards = [SearchShard() for _ in range(self.num_shards)]
+        self.executor = ThreadPoolExecutor(max_workers=self.num_shards, thread_name_prefix="search-shard")
+        
+        # Vectorizer and per-shard matrices are swapped together so in-flight queries see a consistent index
+        self._tfidf_index = None
+    
+    def add_document(self, document: Dict):
+        self.add_documents([document])
+    
+    def add_documents(self, documents: List[Dict]):
+        if not documents:
+            return
+        
+        for document in documents:
+            # Round-robin keeps shards balanced even when one large PDF dominates the corpus
+            row = len(self.documents)
+            self.shards[row % self.num_shards].add_document(document, row)
+            self.documents.append(document)
+        
+        self._rebuild_tfidf_index()
+    
+    def _create_vectorizer(self) -> TfidfVectorizer:
+        return TfidfVectorizer(
             max_features=1000,
             stop_words='english',
             ngram_range=(1, 2)
         )
-        self.tfidf_matrix = None
-    
-    def add_document(self, document: Dict):
-        self.documents.append(document)
-        self._rebuild_tfidf_index()
     
     def _rebuild_tfidf_index(self):
         if self.documents:
             texts = [doc['content'] for doc in self.documents]
             try:
-                self.tfidf_matrix = self.tfidf_vectorizer.fit_transform(texts)
-                logger.debug(f"Rebuilt TF-IDF index with {len(texts)} documents")
+                vectorizer = self._create_vectorizer()
+                tfidf_matrix = vectorizer.fit_transform(texts)
+                
+                # Fit IDF on the whole corpus so scores stay comparable, then split the rows by shard
+                shard_matrices = [
+                    tfidf_matrix[shard.rows] if shard.rows else None
+                    for shard in self.shards
+                ]
+                self._tfidf_index = (vectorizer, shard_matrices)
+                logger.debug(f"Rebuilt TF-IDF index with {len(texts)} documents across {self.num_shards} shards")
             except ValueError as e:
                 logger.warning(f"TF-IDF indexing failed: {e}")
-                self.tfidf_matrix = None
+                self._tfidf_index = None
     
     async def search(self, query: str, top_k: int = 5, include_keywords: bool = True) -> List[Dict]:
         if not self.documents:
@@ -40,8 +121,8 @@ class SemanticSearch:
             
             # Perform keyword search using TF-IDF
             keyword_results = []
-            if include_keywords and self.tfidf_matrix is not None:
-                keyword_results = self._keyword_search(query, top_k * 2)
+            if include_keywords and self._tfidf_index is not None:
+                keyword_results = await self._keyword_search(query, top_k * 2)
             
             # Combine results
             combined_results = self._combine_results(semantic_results, keyword_results)
@@ -54,38 +135,46 @@ class SemanticSearch:
     
     async def _semantic_search(self, query: str, top_k: int) -> List[Dict]:
         # Placeholder for semantic search - would use actual embeddings
-        results = []
         query_words = set(query.lower().split())
         
-        for doc in self.documents:
-            content_words = set(doc['content'].lower().split())
-            overlap = len(query_words.intersection(content_words))
-            score = overlap / len(query_words) if query_words else 0
-            
-            if score > 0:
-                result = doc.copy()
-                result['score'] = score
-                results.append(result)
-        
-        return sorted(results, key=lambda x: x['score'], reverse=True)[:top_k]
+        shard_results = await self._fan_out(
+            lambda shard: shard.semantic_search(query_words, top_k),
+            self.shards
+        )
+        return self._merge_shard_results(shard_results, top_k)
     
-    def _keyword_search(self, query: str, top_k: int) -> List[Dict]:
+    async def _keyword_search(self, query: str, top_k: int) -> List[Dict]:
         try:
-            query_vector = self.tfidf_vectorizer.transform([query])
-            similarities = cosine_similarity(query_vector, self.tfidf_matrix)[0]
-            
-            results = []
-            for idx, score in enumerate(similarities):
-                if score > 0:
-                    result = self.documents[idx].copy()
-                    result['score'] = float(score)
-                    results.append(result)
+            vectorizer, shard_matrices = self._tfidf_index
+            query_vector = vectorizer.transform([query])
             
-            return sorted(results, key=lambda x: x['score'], reverse=True)[:top_k]
+            searchable = [
+                (shard, matrix) for shard, matrix in zip(self.shards, shard_matrices)
+                if matrix is not None
+            ]
+            shard_results = await self._fan_out(
+                lambda item: item[0].keyword_search(query_vector, item[1], top_k),
+                searchable
+            )
+            return self._merge_shard_results(shard_results, top_k)
         except Exception as e:
             logger.error(f"Keyword search failed: {e}")
             return []
     
+    async def _fan_out(self, fn, items) -> List[List[ShardHit]]:
+        # Small corpora score faster inline than the thread pool can dispatch
+        if len(self.documents) < self.fanout_min_chunks:
+            return [fn(item) for item in items]
+        
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*[
+            loop.run_in_executor(self.executor, fn, item) for item in items
+        ])
+    
+    def _merge_shard_results(self, shard_results: List[List[ShardHit]], top_k: int) -> List[Dict]:
+        hits = heapq.nlargest(top_k, chain.from_iterable(shard_results), key=_rank_key)
+        return [result for _, _, result in hits]
+    
     def _combine_results(self, semantic_results: List[Dict], keyword_results: List[Dict]) -> List[Dict]:
         # Simple combination strategy
         all_results = {}
@@ -112,5 +201,7 @@ class SemanticSearch:
         return {
             "total_documents": len(self.documents),
             "total_files": len(set(doc['filename'] for doc in self.documents)),
+            "num_shards": self.num_shards,
+            "shard_sizes": [len(shard.documents) for shard in self.shards],
             "avg_chunk_length": np.mean([len(doc['content']) for doc in self.documents]) if self.documents else 0
         }
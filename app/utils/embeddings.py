@@ -1,16 +1,16 @@
 import logging
-import requests
 import os
 import hashlib
 import numpy as np
 from typing import List
+from .mistral_gateway import mistral_gateway
 
 logger = logging.getLogger(__name__)
 
 class EmbeddingService:
     def __init__(self):
         self.api_key = os.getenv("MISTRAL_API_KEY")
-        self.base_url = "https://api.mistral.ai/v1"
+        self.gateway = mistral_gateway
         self.model = "mistral-embed"
         
         if not self.api_key or self.api_key == "your_api_key_here":
@@ -20,39 +20,27 @@ class EmbeddingService:
             logger.info("Mistral AI embedding service initialized")
             self.use_fallback = False
     
-    async def get_embedding(self, text: str) -> List[float]:
+    async def get_embedding(self, text: str, allow_fallback: bool = True) -> List[float]:
         if self.use_fallback:
             return self._generate_fallback_embedding(text)
         
         try:
             return await self._get_mistral_embedding(text)
         except Exception as e:
+            # Callers that persist vectors opt out so hash embeddings never reach the index
+            if not allow_fallback:
+                raise
             logger.warning(f"Mistral API failed, using fallback: {e}")
             return self._generate_fallback_embedding(text)
     
     async def _get_mistral_embedding(self, text: str) -> List[float]:
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
         data = {
             "model": self.model,
             "input": text
         }
         
-        response = requests.post(
-            f"{self.base_url}/embeddings",
-            headers=headers,
-            json=data,
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            return result["data"][0]["embedding"]
-        else:
-            raise Exception(f"Mistral API error: {response.status_code}")
+        result = await self.gateway.post("/embeddings", self.api_key, data)
+        return result["data"][0]["embedding"]
     
     def _generate_fallback_embedding(self, text: str) -> List[float]:
         # Hash-based embedding for development/testing
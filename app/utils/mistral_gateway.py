@@ -0,0 +1,238 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import requests
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class UpstreamUnavailableError(Exception):
+    """Raised when the circuit breaker is open and calls are rejected without hitting the API."""
+
+class UpstreamResponseError(Exception):
+    """Raised when the API answered with a non-200 status."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"Mistral API error: {status_code}")
+        self.status_code = status_code
+
+    def is_transient(self) -> bool:
+        return self.status_code == 429 or self.status_code >= 500
+
+class AdaptiveTokenBucket:
+    def __init__(self, rate: float, capacity: float, min_rate: float, max_rate: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0
+        self.last_decrease = float("-inf")
+        self.waiting = 0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    async def acquire(self):
+        self.waiting += 1
+        try:
+            # The lock keeps waiters FIFO so a burst drains at the current rate
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    if now < self.blocked_until:
+                        await asyncio.sleep(self.blocked_until - now)
+                        continue
+
+                    self._refill()
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+        finally:
+            self.waiting -= 1
+
+    def on_success(self):
+        # Additive increase back towards the configured ceiling
+        self.rate = min(self.max_rate, self.rate + self.min_rate)
+
+    def on_rate_limited(self, sent_at: float, retry_after: Optional[float] = None) -> bool:
+        now = time.monotonic()
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+
+        # A burst of 429s is one congestion event: ignore requests sent before the last
+        # decrease, and any that arrive within one interval of it at the new rate
+        if sent_at <= self.last_decrease or now < self.last_decrease + 1 / self.rate:
+            return False
+
+        # Multiplicative decrease
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = 0
+        self.last_decrease = now
+        logger.warning(f"Mistral rate limited, lowering request rate to {self.rate:.2f}/s")
+        return True
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+
+    def allow_request(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            logger.info("Mistral circuit breaker half-open, probing upstream")
+
+        if self.state == self.HALF_OPEN:
+            # Only a single probe request is let through until it resolves
+            if self.probe_in_flight:
+                return False
+            self.probe_in_flight = True
+
+        return True
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info("Mistral circuit breaker closed")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self.probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Mistral circuit breaker opened after {self.consecutive_failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def release_probe(self):
+        self.probe_in_flight = False
+
+    def is_open(self) -> bool:
+        return self.state == self.OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+
+class MistralGateway:
+    def __init__(self):
+        self.base_url = "https://api.mistral.ai/v1"
+
+        rate = float(os.getenv("MISTRAL_RATE_LIMIT", 5))
+        self.limiter = AdaptiveTokenBucket(
+            rate=rate,
+            capacity=float(os.getenv("MISTRAL_RATE_BURST", rate)),
+            min_rate=float(os.getenv("MISTRAL_MIN_RATE", 0.5)),
+            max_rate=rate
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("MISTRAL_BREAKER_THRESHOLD", 5)),
+            reset_timeout=float(os.getenv("MISTRAL_BREAKER_RESET_SECONDS", 30))
+        )
+        self.timeout = 30
+
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.coalesced_requests = 0
+
+    async def post(self, path: str, api_key: str, payload: Dict) -> Dict:
+        # Identical concurrent requests share one upstream call, never across credentials
+        credential = hashlib.sha256(api_key.encode()).hexdigest()
+        key = credential + path + json.dumps(payload, sort_keys=True)
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.coalesced_requests += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.ensure_future(self._send(path, api_key, payload))
+        self._in_flight[key] = future
+        future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _send(self, path: str, api_key: str, payload: Dict) -> Dict:
+        if self.breaker.is_open():
+            raise UpstreamUnavailableError("Mistral circuit breaker is open")
+
+        await self.limiter.acquire()
+
+        if not self.breaker.allow_request():
+            raise UpstreamUnavailableError("Mistral circuit breaker is open")
+
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+
+        sent_at = time.monotonic()
+        try:
+            # requests is blocking, keep it off the event loop
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(
+                None,
+                lambda: requests.post(
+                    f"{self.base_url}{path}",
+                    headers=headers,
+                    json=payload,
+                    timeout=self.timeout
+                )
+            )
+        except Exception:
+            self.breaker.record_failure()
+            raise
+
+        if response.status_code == 200:
+            self.limiter.on_success()
+            self.breaker.record_success()
+            return response.json()
+
+        if response.status_code == 429:
+            # Only the first 429 of a burst counts towards opening the breaker
+            if self.limiter.on_rate_limited(sent_at, self._parse_retry_after(response)):
+                self.breaker.record_failure()
+            else:
+                self.breaker.release_probe()
+        elif response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            # Client errors say nothing about upstream health
+            self.breaker.record_success()
+
+        raise UpstreamResponseError(response.status_code)
+
+    def _parse_retry_after(self, response) -> Optional[float]:
+        try:
+            return float(response.headers.get("Retry-After"))
+        except (TypeError, ValueError):
+            return None
+
+    def is_available(self) -> bool:
+        return not self.breaker.is_open()
+
+    def get_stats(self) -> Dict:
+        return {
+            "rate_limit_per_second": round(self.limiter.rate, 3),
+            "queued_requests": self.limiter.waiting,
+            "in_flight_requests": len(self._in_flight),
+            "coalesced_requests": self.coalesced_requests,
+            "breaker_state": self.breaker.state,
+            "consecutive_failures": self.breaker.consecutive_failures
+        }
+
+# Shared by every service so they draw from the same rate budget
+mistral_gateway = MistralGateway()
@@ -0,0 +1,92 @@
+import argparse
+import asyncio
+import os
+import random
+import time
+import numpy as np
+
+from app.services.semantic_search import SemanticSearch
+
+WORDS = [
+    "revenue", "growth", "quarter", "policy", "customer", "contract", "risk", "market",
+    "product", "report", "analysis", "model", "training", "data", "pipeline", "document",
+    "security", "compliance", "budget", "forecast", "strategy", "operations", "supply", "cost",
+    "pricing", "research", "results", "summary", "employee", "benefit", "network", "service"
+]
+
+# Share of the corpus per file: many equal files, or a few large PDFs as in typical use
+LAYOUTS = {
+    "even": lambda num_files: [1 / num_files] * num_files,
+    "skewed": lambda num_files: [0.7, 0.2, 0.1]
+}
+
+def build_corpus(num_chunks: int, file_shares, chunk_words: int):
+    rng = random.Random(42)
+    corpus = []
+
+    # Files are ingested one after another, so each file's chunks are contiguous
+    for file_idx, share in enumerate(file_shares):
+        file_chunks = num_chunks - len(corpus) if file_idx == len(file_shares) - 1 else int(num_chunks * share)
+        corpus.extend({
+            "filename": f"document_{file_idx}.pdf",
+            "chunk_id": chunk_id,
+            "content": " ".join(rng.choice(WORDS) for _ in range(chunk_words))
+        } for chunk_id in range(file_chunks))
+
+    return corpus
+
+def build_index(corpus, num_shards: int) -> SemanticSearch:
+    search = SemanticSearch(num_shards=num_shards)
+    search.add_documents(corpus)
+    return search
+
+async def measure(search: SemanticSearch, queries, concurrency: int):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_query(query):
+        async with semaphore:
+            start = time.perf_counter()
+            await search.search(query, top_k=5)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*[run_query(q) for q in queries])
+    return np.array(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure search latency against shard count")
+    parser.add_argument("--chunks", type=int, default=50000)
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--chunk-words", type=int, default=150)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--max-shards", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    queries = [" ".join(rng.sample(WORDS, 4)) for _ in range(args.queries)]
+
+    shard_counts = sorted({1, 2, 4, 8, 16, args.max_shards} & set(range(1, args.max_shards + 1)))
+
+    print(f"{args.chunks} chunks, {args.queries} queries, concurrency {args.concurrency}, {os.cpu_count()} cores")
+    print(f"{'layout':>7} {'shards':>6} {'largest':>8} {'p50 ms':>9} {'p99 ms':>9} {'qps':>8}")
+
+    for layout, file_shares in LAYOUTS.items():
+        corpus = build_corpus(args.chunks, file_shares(args.files), args.chunk_words)
+
+        for num_shards in shard_counts:
+            search = build_index(corpus, num_shards)
+            largest_shard = max(search.get_stats()["shard_sizes"])
+
+            # Warm up the thread pool before timing
+            asyncio.run(measure(search, queries[:10], args.concurrency))
+
+            start = time.perf_counter()
+            latencies = asyncio.run(measure(search, queries, args.concurrency))
+            elapsed = time.perf_counter() - start
+
+            print(f"{layout:>7} {num_shards:>6} {largest_shard:>8} {np.percentile(latencies, 50):>9.2f} {np.percentile(latencies, 99):>9.2f} {len(queries) / elapsed:>8.1f}")
+            search.executor.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import threading
+import time
+import pytest
+
+from app.utils import mistral_gateway
+from app.utils.mistral_gateway import MistralGateway
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def json(self):
+        return {"data": [{"embedding": [1.0, 0.0]}]}
+
+class FakeUpstream:
+    def __init__(self, responses=None, delay=0.0):
+        self.responses = list(responses or [])
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, url, **kwargs):
+        with self._lock:
+            self.calls += 1
+            response = self.responses.pop(0) if self.responses else FakeResponse(200)
+        time.sleep(self.delay)
+        return response
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def upstream(monkeypatch):
+    fake = FakeUpstream()
+    monkeypatch.setattr(mistral_gateway.requests, "post", fake)
+    return fake
+
+@pytest.fixture
+def gateway(monkeypatch):
+    monkeypatch.setenv("MISTRAL_RATE_LIMIT", "100")
+    monkeypatch.setenv("MISTRAL_MIN_RATE", "1")
+    monkeypatch.setenv("MISTRAL_BREAKER_THRESHOLD", "3")
+    monkeypatch.setenv("MISTRAL_BREAKER_RESET_SECONDS", "0.05")
+    return MistralGateway()
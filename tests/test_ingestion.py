@@ -0,0 +1,115 @@
+import asyncio
+import pytest
+
+from app.services.ingestion import IngestionService
+from app.utils.mistral_gateway import CircuitBreaker, UpstreamResponseError
+from .conftest import FakeResponse
+
+def make_chunks(count, filename="report.pdf"):
+    return [{
+        "chunk_id": i,
+        "filename": filename,
+        "content": f"chunk {i} of {filename}"
+    } for i in range(count)]
+
+@pytest.fixture
+def service(monkeypatch, gateway, upstream):
+    monkeypatch.setenv("MISTRAL_API_KEY", "test-key")
+    service = IngestionService()
+    service.embedding_service.gateway = gateway
+    return service
+
+def process(service, monkeypatch, chunks):
+    monkeypatch.setattr(service.pdf_extractor, "extract_text", lambda content: "text")
+    monkeypatch.setattr(service.pdf_extractor, "create_chunks", lambda text, filename: chunks)
+    return asyncio.run(service.process_document(b"%PDF", chunks[0]["filename"]))
+
+def test_get_embedding_without_fallback_raises(service, upstream):
+    upstream.responses = [FakeResponse(503), FakeResponse(503)]
+    embedding_service = service.embedding_service
+
+    with pytest.raises(UpstreamResponseError):
+        asyncio.run(embedding_service.get_embedding("text", allow_fallback=False))
+
+    # The default still degrades to the hash embedding for query-time callers
+    fallback = asyncio.run(embedding_service.get_embedding("text"))
+    assert len(fallback) == 1024
+
+def test_process_document_embeds_chunks(service, monkeypatch):
+    processed, deferred = process(service, monkeypatch, make_chunks(3))
+
+    assert deferred == 0
+    assert [c["embedding"] for c in processed] == [[1.0, 0.0]] * 3
+    assert not service.pending_chunks
+
+def test_process_document_defers_without_calling_open_breaker(service, monkeypatch, upstream):
+    breaker = service.embedding_service.gateway.breaker
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+    processed, deferred = process(service, monkeypatch, make_chunks(4))
+
+    assert processed == []
+    assert deferred == 4
+    assert upstream.calls == 0
+    assert all("embedding_attempts" not in c for c in service.pending_chunks)
+
+def test_process_document_defers_rest_once_breaker_opens(service, monkeypatch, upstream):
+    upstream.responses = [FakeResponse(503) for _ in range(3)]
+
+    processed, deferred = process(service, monkeypatch, make_chunks(6))
+
+    assert processed == []
+    assert deferred == 6
+    assert upstream.calls == 3
+    assert service.embedding_service.gateway.breaker.state == CircuitBreaker.OPEN
+    assert [c["chunk_id"] for c in service.pending_chunks] == list(range(6))
+
+def test_retry_pending_requeues_transient_failures_without_counting(service, upstream):
+    service.pending_chunks.extend(make_chunks(2))
+    upstream.responses = [FakeResponse(429), FakeResponse(503)]
+
+    assert asyncio.run(service.retry_pending()) == []
+    assert [c["chunk_id"] for c in service.pending_chunks] == [0, 1]
+    assert all(c.get("embedding_attempts", 0) == 0 for c in service.pending_chunks)
+
+    retried = asyncio.run(service.retry_pending())
+
+    assert [c["chunk_id"] for c in retried] == [0, 1]
+    assert not service.pending_chunks
+    assert service.processed_documents == retried
+
+def test_retry_pending_stops_when_breaker_opens(service, upstream):
+    service.pending_chunks.extend(make_chunks(5))
+    upstream.responses = [FakeResponse(503) for _ in range(3)]
+
+    assert asyncio.run(service.retry_pending()) == []
+
+    assert upstream.calls == 3
+    assert len(service.pending_chunks) == 5
+
+def test_retry_pending_drops_after_max_retries(service, upstream):
+    service.pending_chunks.extend(make_chunks(1))
+    upstream.responses = [FakeResponse(400) for _ in range(service.max_embedding_retries)]
+
+    for attempt in range(1, service.max_embedding_retries):
+        asyncio.run(service.retry_pending())
+        assert service.pending_chunks[0]["embedding_attempts"] == attempt
+
+    asyncio.run(service.retry_pending())
+
+    assert not service.pending_chunks
+    assert upstream.calls == service.max_embedding_retries
+
+def test_concurrent_retry_pending_indexes_each_chunk_once(service, upstream):
+    service.pending_chunks.extend(make_chunks(4))
+    upstream.delay = 0.01
+
+    async def run():
+        return await asyncio.gather(service.retry_pending(), service.retry_pending())
+
+    first, second = asyncio.run(run())
+
+    assert sorted(c["chunk_id"] for c in first + second) == [0, 1, 2, 3]
+    assert not service.pending_chunks
+    assert upstream.calls == 4
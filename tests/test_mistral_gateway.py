@@ -0,0 +1,159 @@
+import asyncio
+import time
+import pytest
+
+from app.utils import mistral_gateway
+from app.utils.mistral_gateway import (
+    AdaptiveTokenBucket,
+    CircuitBreaker,
+    MistralGateway,
+    UpstreamResponseError,
+    UpstreamUnavailableError
+)
+from .conftest import FakeClock, FakeResponse
+
+def test_rate_limited_halves_rate_and_honours_retry_after(gateway, upstream):
+    upstream.responses = [FakeResponse(429, {"Retry-After": "0.2"})]
+
+    async def run():
+        with pytest.raises(UpstreamResponseError):
+            await gateway.post("/embeddings", "key", {"input": "a"})
+
+        start = time.monotonic()
+        await gateway.post("/embeddings", "key", {"input": "b"})
+        return time.monotonic() - start
+
+    waited = asyncio.run(run())
+
+    assert gateway.limiter.rate == pytest.approx(51.0)  # halved to 50, then +1 on success
+    assert waited >= 0.19
+    assert upstream.calls == 2
+
+def test_rate_limited_burst_halves_rate_once(gateway, upstream):
+    upstream.responses = [FakeResponse(429) for _ in range(5)]
+    upstream.delay = 0.02
+
+    async def run():
+        results = await asyncio.gather(*[
+            gateway.post("/embeddings", "key", {"input": str(i)}) for i in range(5)
+        ], return_exceptions=True)
+        assert all(isinstance(r, UpstreamResponseError) for r in results)
+
+    asyncio.run(run())
+
+    assert gateway.limiter.rate == pytest.approx(50.0)
+    assert gateway.breaker.consecutive_failures == 1
+    assert gateway.breaker.state == CircuitBreaker.CLOSED
+
+def test_identical_concurrent_requests_are_coalesced(gateway, upstream):
+    upstream.delay = 0.05
+
+    async def run():
+        return await asyncio.gather(
+            gateway.post("/embeddings", "key", {"model": "m", "input": "same"}),
+            gateway.post("/embeddings", "key", {"input": "same", "model": "m"})
+        )
+
+    first, second = asyncio.run(run())
+
+    assert first == second
+    assert upstream.calls == 1
+    assert gateway.coalesced_requests == 1
+    assert gateway.get_stats()["in_flight_requests"] == 0
+
+def test_requests_with_different_credentials_are_not_coalesced(gateway, upstream):
+    upstream.delay = 0.05
+
+    async def run():
+        return await asyncio.gather(
+            gateway.post("/embeddings", "key-a", {"input": "same"}),
+            gateway.post("/embeddings", "key-b", {"input": "same"})
+        )
+
+    asyncio.run(run())
+
+    assert upstream.calls == 2
+    assert gateway.coalesced_requests == 0
+
+def test_breaker_opens_fails_fast_and_recovers(gateway, upstream):
+    upstream.responses = [FakeResponse(503) for _ in range(3)]
+
+    async def run():
+        for i in range(3):
+            with pytest.raises(UpstreamResponseError):
+                await gateway.post("/embeddings", "key", {"input": str(i)})
+        assert gateway.breaker.state == CircuitBreaker.OPEN
+        assert not gateway.is_available()
+
+        with pytest.raises(UpstreamUnavailableError):
+            await gateway.post("/embeddings", "key", {"input": "rejected"})
+        assert upstream.calls == 3
+
+        await asyncio.sleep(0.06)
+        assert gateway.is_available()
+        await gateway.post("/embeddings", "key", {"input": "probe"})
+
+    asyncio.run(run())
+
+    assert gateway.breaker.state == CircuitBreaker.CLOSED
+    assert gateway.breaker.consecutive_failures == 0
+    assert upstream.calls == 4
+
+def test_breaker_state_transitions(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(mistral_gateway.time, "monotonic", clock)
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+    clock.now += 30
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    # A failed probe reopens immediately
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+def test_half_open_breaker_allows_single_probe(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(mistral_gateway.time, "monotonic", clock)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+
+    breaker.record_failure()
+    clock.now += 30
+
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    assert not breaker.allow_request()
+
+    breaker.release_probe()
+    assert breaker.allow_request()
+
+def test_token_bucket_recovers_rate_additively(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(mistral_gateway.time, "monotonic", clock)
+    bucket = AdaptiveTokenBucket(rate=8, capacity=8, min_rate=1, max_rate=8)
+
+    assert bucket.on_rate_limited(sent_at=clock.now)
+    assert bucket.rate == 4
+
+    clock.now += 1
+    assert bucket.on_rate_limited(sent_at=clock.now - 0.5)
+    assert bucket.rate == 2
+
+    bucket.on_success()
+    bucket.on_success()
+    assert bucket.rate == 4
+    for _ in range(10):
+        bucket.on_success()
+    assert bucket.rate == 8
@@ -0,0 +1,88 @@
+import asyncio
+import random
+import pytest
+
+from app.services.semantic_search import SemanticSearch
+
+WORDS = ["alpha", "beta", "gamma", "delta", "revenue", "growth", "risk", "market", "policy", "budget"]
+
+QUERIES = ["alpha", "alpha beta", "revenue growth risk", "market policy budget delta"]
+
+def make_corpus(num_chunks=60, filenames=("a.pdf", "b.pdf")):
+    rng = random.Random(3)
+    per_file = num_chunks // len(filenames)
+    return [{
+        "filename": filename,
+        "chunk_id": chunk_id,
+        "content": " ".join(rng.choice(WORDS) for _ in range(8))
+    } for filename in filenames for chunk_id in range(per_file)]
+
+def make_search(corpus, num_shards, fanout_min_chunks):
+    search = SemanticSearch(num_shards=num_shards)
+    search.fanout_min_chunks = fanout_min_chunks
+    search.add_documents(corpus)
+    return search
+
+def ranked(results):
+    return [(r["filename"], r["chunk_id"], round(r["score"], 9)) for r in results]
+
+@pytest.mark.parametrize("num_shards", [1, 2, 4])
+@pytest.mark.parametrize("fanout_min_chunks", [0, 10_000])
+def test_sharded_results_match_single_shard(num_shards, fanout_min_chunks):
+    corpus = make_corpus()
+    reference = make_search(corpus, num_shards=1, fanout_min_chunks=10_000)
+    sharded = make_search(corpus, num_shards, fanout_min_chunks)
+
+    for query in QUERIES:
+        for top_k in (1, 3, 10):
+            expected = asyncio.run(reference.search(query, top_k=top_k))
+            actual = asyncio.run(sharded.search(query, top_k=top_k))
+            assert ranked(actual) == ranked(expected)
+
+            expected = asyncio.run(reference._keyword_search(query, top_k))
+            actual = asyncio.run(sharded._keyword_search(query, top_k))
+            assert ranked(actual) == ranked(expected)
+
+@pytest.mark.parametrize("num_shards", [1, 2, 4])
+@pytest.mark.parametrize("fanout_min_chunks", [0, 10_000])
+def test_tied_scores_keep_corpus_order(num_shards, fanout_min_chunks):
+    corpus = [{
+        "filename": "a.pdf",
+        "chunk_id": i,
+        "content": "alpha beta gamma" if i % 2 == 0 else "alpha beta delta"
+    } for i in range(20)]
+    search = make_search(corpus, num_shards, fanout_min_chunks)
+
+    semantic = asyncio.run(search._semantic_search("alpha", 3))
+    keyword = asyncio.run(search._keyword_search("alpha beta", 3))
+
+    assert [r["chunk_id"] for r in semantic] == [0, 1, 2]
+    assert [r["chunk_id"] for r in keyword] == [0, 1, 2]
+
+def test_add_documents_rebuilds_once_and_matches_add_document(monkeypatch):
+    corpus = make_corpus()
+    batched = SemanticSearch(num_shards=2)
+    single = SemanticSearch(num_shards=2)
+
+    rebuilds = []
+    original_rebuild = batched._rebuild_tfidf_index
+    monkeypatch.setattr(batched, "_rebuild_tfidf_index", lambda: rebuilds.append(1) or original_rebuild())
+
+    batched.add_documents(corpus)
+    batched.add_documents([])
+    for doc in corpus:
+        single.add_document(doc)
+
+    assert len(rebuilds) == 1
+    for query in QUERIES:
+        assert ranked(asyncio.run(batched.search(query))) == ranked(asyncio.run(single.search(query)))
+
+def test_shard_sizes_are_balanced_for_a_single_file():
+    search = make_search(make_corpus(num_chunks=202, filenames=("large.pdf",)), num_shards=4, fanout_min_chunks=0)
+
+    stats = search.get_stats()
+
+    assert stats["num_shards"] == 4
+    assert stats["total_documents"] == 202
+    assert stats["total_files"] == 1
+    assert stats["shard_sizes"] == [51, 51, 50, 50]